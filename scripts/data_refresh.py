@@ -8,19 +8,29 @@ Location: Jammu, J&K, India
 
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 from datetime import datetime, timedelta
 import logging
-import schedule
-import time
+import asyncio
 import os
-import json
+import orjson
+from pathlib import Path
 from sqlalchemy import create_engine
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.executors.pool import ThreadPoolExecutor as SchedulerThreadPool
+import jinja2
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import warnings
 warnings.filterwarnings('ignore')
 
+try:
+    import numba
+except ImportError:
+    numba = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -31,6 +41,120 @@ logging.basicConfig(
     ]
 )
 
+# Alert email body, compiled once per MarketingDataRefresh instance
+ALERT_HTML = """
+<html>
+    <body>
+        <h2>Marketing Campaign Performance Alerts</h2>
+        <p>Generated on: {{ now.strftime('%Y-%m-%d %H:%M:%S') }}</p>
+        <p>Total Alerts: {{ alerts | length }}</p>
+        
+        <table border="1" style="border-collapse: collapse;">
+            <tr style="background-color: #f2f2f2;">
+                <th>Priority</th>
+                <th>Campaign</th>
+                <th>Channel</th>
+                <th>Issue</th>
+                <th>Action Required</th>
+            </tr>
+            {% for alert in alerts %}
+            <tr>
+                <td style="background-color: {{ '#ff4444' if alert.priority == 'High' else '#ffaa00' }}; color: white; font-weight: bold;">{{ alert.priority }}</td>
+                <td>{{ alert.campaign_name }}</td>
+                <td>{{ alert.channel }}</td>
+                <td>{{ alert.issue }}</td>
+                <td>{{ alert.recommended_action }}</td>
+            </tr>
+            {% endfor %}
+        </table>
+        <br>
+        <p>Please review and take appropriate actions for the flagged campaigns.</p>
+        <p>Best regards,<br>Marketing Analytics Team</p>
+    </body>
+</html>
+"""
+
+# KPI columns computed per campaign, in the order the database query returns them
+KPI_COLUMNS = [
+    'roi_percentage',
+    'cost_per_lead',
+    'cost_per_acquisition',
+    'conversion_rate',
+    'click_through_rate'
+]
+
+# Parquet schemas for the refresh extracts. Declared up front because a
+# chunk whose column is entirely NULL (e.g. end_date of ongoing campaigns)
+# would otherwise be typed as null and reject later non-null chunks.
+CAMPAIGN_SCHEMA = pa.schema([
+    ('campaign_id', pa.string()),
+    ('campaign_name', pa.string()),
+    ('campaign_type', pa.string()),
+    ('channel', pa.string()),
+    ('start_date', pa.date32()),
+    ('end_date', pa.date32()),
+    ('budget_allocated', pa.float64()),
+    ('total_spend', pa.float64()),
+    ('impressions', pa.int64()),
+    ('clicks', pa.int64()),
+    ('leads_generated', pa.int64()),
+    ('conversions', pa.int64()),
+    ('revenue_generated', pa.float64()),
+    ('status', pa.string())
+] + [(column, pa.float64()) for column in KPI_COLUMNS])
+
+BUDGET_SCHEMA = pa.schema([
+    ('budget_id', pa.string()),
+    ('campaign_id', pa.string()),
+    ('channel', pa.string()),
+    ('budget_category', pa.string()),
+    ('allocated_amount', pa.float64()),
+    ('spent_amount', pa.float64()),
+    ('remaining_amount', pa.float64()),
+    ('quarter', pa.string()),
+    ('month', pa.string()),
+    ('year', pa.int64()),
+    ('cost_center', pa.string())
+])
+
+def _compute_kpis_numpy(spend, leads, conv, rev, imps, clicks,
+                        out_roi, out_cpl, out_cpa, out_cvr, out_ctr):
+    """Fill the KPI output arrays with NumPy; zero denominators yield 0"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out_roi[:] = np.where(spend > 0, (rev - spend) / spend * 100, 0.0)
+        out_cpl[:] = np.where(leads > 0, spend / leads, 0.0)
+        out_cpa[:] = np.where(conv > 0, spend / conv, 0.0)
+        out_cvr[:] = np.where(leads > 0, conv / leads * 100, 0.0)
+        out_ctr[:] = np.where(imps > 0, clicks / imps * 100, 0.0)
+
+
+def _compute_kpis_loop(spend, leads, conv, rev, imps, clicks,
+                       out_roi, out_cpl, out_cpa, out_cvr, out_ctr):
+    """Fill the KPI output arrays in a single fused pass (compiled by Numba)"""
+    n = spend.shape[0]
+    for i in numba.prange(n):
+        sp = spend[i]
+        ld = leads[i]
+        cv = conv[i]
+        out_roi[i] = (rev[i] - sp) / sp * 100.0 if sp > 0.0 else 0.0
+        out_cpl[i] = sp / ld if ld > 0.0 else 0.0
+        out_cpa[i] = sp / cv if cv > 0.0 else 0.0
+        out_cvr[i] = cv / ld * 100.0 if ld > 0.0 else 0.0
+        out_ctr[i] = clicks[i] / imps[i] * 100.0 if imps[i] > 0.0 else 0.0
+
+
+# Use the fused Numba kernel when available, otherwise fall back to NumPy.
+# fastmath omits 'nnan'/'ninf': NULL counts arrive as NaN and must hit the 0 guards.
+if numba is not None:
+    _compute_kpis = numba.njit(
+        parallel=True,
+        fastmath={'contract', 'arcp', 'reassoc', 'afn'},
+        cache=True
+    )(_compute_kpis_loop)
+else:
+    _compute_kpis = _compute_kpis_numpy
+
+
 class MarketingDataRefresh:
     """
     Marketing Campaign Data Refresh and Automation Class
@@ -44,16 +168,17 @@ class MarketingDataRefresh:
     def __init__(self, config_file='config/database_config.json'):
         self.config_file = config_file
         self.config = self.load_config()
-        self.engine = None
         self.refresh_status = {}
+        self._kpi_df = None
+        self.alert_template = jinja2.Environment(autoescape=True).from_string(ALERT_HTML)
+        self.connect_database()
         
     def load_config(self):
         """Load database and email configuration"""
         try:
-            with open(self.config_file, 'r') as f:
-                config = json.load(f)
-                logging.info("Configuration loaded successfully")
-                return config
+            config = orjson.loads(Path(self.config_file).read_bytes())
+            logging.info("Configuration loaded successfully")
+            return config
         except FileNotFoundError:
             logging.error(f"Configuration file {self.config_file} not found")
             # Return default configuration
@@ -86,24 +211,75 @@ class MarketingDataRefresh:
             }
         }
     
+    def get_database_url(self):
+        """Build the SQLAlchemy database URL"""
+        db_config = self.config['database']
+        return f"mysql+pymysql://{db_config['username']}:{db_config['password']}@{db_config['host']}:{db_config['port']}/{db_config['database']}"
+    
     def connect_database(self):
-        """Establish database connection"""
+        """Create the engine and connection pool reused across refresh cycles"""
         try:
-            db_config = self.config['database']
-            connection_string = f"mysql+pymysql://{db_config['username']}:{db_config['password']}@{db_config['host']}:{db_config['port']}/{db_config['database']}"
-            self.engine = create_engine(connection_string)
+            connection_string = self.get_database_url()
+            self.engine = create_engine(
+                connection_string,
+                pool_size=2,
+                max_overflow=0,
+                pool_pre_ping=True,
+                pool_recycle=1800
+            )
             logging.info("Database connection established successfully")
             return True
         except Exception as e:
             logging.error(f"Failed to connect to database: {str(e)}")
+            self.engine = None
             return False
     
-    def refresh_campaign_data(self):
+    def open_snapshot_connection(self):
+        """Open a connection whose reads share one REPEATABLE READ snapshot"""
+        if self.engine is None:
+            return None
+        conn = None
+        try:
+            conn = self.engine.connect()
+            # Server-side cursor so the driver does not buffer whole results
+            return conn.execution_options(
+                isolation_level='REPEATABLE READ',
+                stream_results=True
+            )
+        except Exception as e:
+            logging.error(f"Failed to open database connection: {str(e)}")
+            if conn is not None:
+                conn.close()
+            return None
+    
+    def stream_query_to_parquet(self, query, output_path, schema, conn=None, chunksize=50000):
+        """Stream a query into a Parquet file one chunk at a time; returns the row count"""
+        if conn is None:
+            if self.engine is None:
+                raise ConnectionError("Database connection not available")
+            with self.engine.connect().execution_options(stream_results=True) as own_conn:
+                return self.stream_query_to_parquet(query, output_path, schema, own_conn, chunksize)
+        
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        partial_path = f"{output_path}.partial"
+        records = 0
+        try:
+            with pq.ParquetWriter(partial_path, schema, compression='zstd') as writer:
+                for chunk in pd.read_sql(query, conn, chunksize=chunksize):
+                    writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+                    records += len(chunk)
+            
+            # Replace the previous extract only once the full result has been written
+            os.replace(partial_path, output_path)
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+        
+        return records
+    
+    def refresh_campaign_data(self, conn=None):
         """Refresh campaign performance data"""
         try:
-            if not self.connect_database():
-                return False
-            
             logging.info("Starting campaign data refresh...")
             
             # Extract latest campaign data
@@ -122,24 +298,37 @@ class MarketingDataRefresh:
                 leads_generated,
                 conversions,
                 revenue_generated,
-                status
+                status,
+                -- * 1e0 makes MySQL divide in DOUBLE rather than 4-decimal DECIMAL
+                CASE WHEN total_spend > 0
+                    THEN (revenue_generated - total_spend) * 1e0 / total_spend * 100
+                    ELSE 0 END AS roi_percentage,
+                CASE WHEN leads_generated > 0
+                    THEN total_spend * 1e0 / leads_generated
+                    ELSE 0 END AS cost_per_lead,
+                CASE WHEN conversions > 0
+                    THEN total_spend * 1e0 / conversions
+                    ELSE 0 END AS cost_per_acquisition,
+                CASE WHEN leads_generated > 0
+                    THEN conversions * 1e0 / leads_generated * 100
+                    ELSE 0 END AS conversion_rate,
+                CASE WHEN impressions > 0
+                    THEN clicks * 1e0 / impressions * 100
+                    ELSE 0 END AS click_through_rate
             FROM marketing_campaigns 
             WHERE start_date >= DATE_SUB(CURDATE(), INTERVAL 6 MONTH)
             ORDER BY start_date DESC
             """
             
-            campaign_data = pd.read_sql(query, self.engine)
-            
-            # Save to processed data folder
-            output_path = 'data/processed/campaign_data_latest.csv'
-            os.makedirs('data/processed', exist_ok=True)
-            campaign_data.to_csv(output_path, index=False)
+            # Stream to processed data folder
+            output_path = 'data/processed/campaign_data_latest.parquet'
+            records = self.stream_query_to_parquet(query, output_path, CAMPAIGN_SCHEMA, conn)
             
-            logging.info(f"Campaign data refreshed successfully: {len(campaign_data)} records")
+            logging.info(f"Campaign data refreshed successfully: {records} records")
             self.refresh_status['campaign_data'] = {
                 'status': 'success',
                 'timestamp': datetime.now().isoformat(),
-                'records': len(campaign_data)
+                'records': records
             }
             
             return True
@@ -153,13 +342,9 @@ class MarketingDataRefresh:
             }
             return False
     
-    def refresh_budget_data(self):
+    def refresh_budget_data(self, conn=None):
         """Refresh budget allocation and spending data"""
         try:
-            if not self.engine:
-                if not self.connect_database():
-                    return False
-            
             logging.info("Starting budget data refresh...")
             
             # Extract budget data
@@ -181,17 +366,15 @@ class MarketingDataRefresh:
             ORDER BY year DESC, quarter DESC, month DESC
             """
             
-            budget_data = pd.read_sql(query, self.engine)
+            # Stream refreshed data
+            output_path = 'data/processed/budget_data_latest.parquet'
+            records = self.stream_query_to_parquet(query, output_path, BUDGET_SCHEMA, conn)
             
-            # Save refreshed data
-            output_path = 'data/processed/budget_data_latest.csv'
-            budget_data.to_csv(output_path, index=False)
-            
-            logging.info(f"Budget data refreshed successfully: {len(budget_data)} records")
+            logging.info(f"Budget data refreshed successfully: {records} records")
             self.refresh_status['budget_data'] = {
                 'status': 'success',
                 'timestamp': datetime.now().isoformat(),
-                'records': len(budget_data)
+                'records': records
             }
             
             return True
@@ -211,53 +394,58 @@ class MarketingDataRefresh:
             logging.info("Calculating KPI metrics...")
             
             # Load refreshed campaign data
-            campaign_data = pd.read_csv('data/processed/campaign_data_latest.csv')
-            
-            # Calculate KPIs
-            kpi_data = []
+            campaign_data = pd.read_parquet('data/processed/campaign_data_latest.parquet')
             
-            for _, row in campaign_data.iterrows():
-                # Calculate ROI
-                roi = ((row['revenue_generated'] - row['total_spend']) / row['total_spend'] * 100) if row['total_spend'] > 0 else 0
-                
-                # Calculate Cost Per Lead
-                cpl = row['total_spend'] / row['leads_generated'] if row['leads_generated'] > 0 else 0
-                
-                # Calculate Cost Per Acquisition
-                cpa = row['total_spend'] / row['conversions'] if row['conversions'] > 0 else 0
-                
-                # Calculate Conversion Rate
-                conversion_rate = (row['conversions'] / row['leads_generated'] * 100) if row['leads_generated'] > 0 else 0
-                
-                # Calculate CTR
-                ctr = (row['clicks'] / row['impressions'] * 100) if row['impressions'] > 0 else 0
+            if set(KPI_COLUMNS).issubset(campaign_data.columns):
+                # KPIs were computed by the database in refresh_campaign_data
+                roi, cpl, cpa, conversion_rate, ctr = (
+                    campaign_data[column].to_numpy(dtype=np.float64) for column in KPI_COLUMNS
+                )
+            else:
+                # Calculate KPIs in one kernel call; zero denominators yield 0
+                spend = campaign_data['total_spend'].to_numpy(dtype=np.float64)
+                revenue = campaign_data['revenue_generated'].to_numpy(dtype=np.float64)
+                leads = campaign_data['leads_generated'].to_numpy(dtype=np.float64)
+                conversions = campaign_data['conversions'].to_numpy(dtype=np.float64)
+                impressions = campaign_data['impressions'].to_numpy(dtype=np.float64)
+                clicks = campaign_data['clicks'].to_numpy(dtype=np.float64)
                 
-                kpi_data.append({
-                    'campaign_id': row['campaign_id'],
-                    'campaign_name': row['campaign_name'],
-                    'channel': row['channel'],
-                    'roi_percentage': round(roi, 2),
-                    'cost_per_lead': round(cpl, 2),
-                    'cost_per_acquisition': round(cpa, 2),
-                    'conversion_rate': round(conversion_rate, 2),
-                    'click_through_rate': round(ctr, 4),
-                    'total_investment': row['total_spend'],
-                    'total_revenue': row['revenue_generated'],
-                    'net_profit': row['revenue_generated'] - row['total_spend'],
-                    'profitability_score': min(10, max(0, roi / 30)),  # Scale 0-10
-                    'last_updated': datetime.now().isoformat()
-                })
+                roi, cpl, cpa, conversion_rate, ctr = (np.empty_like(spend) for _ in range(5))
+                _compute_kpis(spend, leads, conversions, revenue, impressions, clicks,
+                              roi, cpl, cpa, conversion_rate, ctr)
+            
+            kpi_df = pd.DataFrame({
+                'campaign_id': campaign_data['campaign_id'],
+                'campaign_name': campaign_data['campaign_name'],
+                'channel': campaign_data['channel'],
+                'roi_percentage': roi,
+                'cost_per_lead': cpl,
+                'cost_per_acquisition': cpa,
+                'conversion_rate': conversion_rate,
+                'click_through_rate': ctr,
+                'total_investment': campaign_data['total_spend'],
+                'total_revenue': campaign_data['revenue_generated'],
+                'net_profit': campaign_data['revenue_generated'] - campaign_data['total_spend'],
+                'profitability_score': np.clip(roi / 30, 0, 10),  # Scale 0-10
+                'last_updated': datetime.now().isoformat()
+            }).round({
+                'roi_percentage': 2,
+                'cost_per_lead': 2,
+                'cost_per_acquisition': 2,
+                'conversion_rate': 2,
+                'click_through_rate': 4
+            })
             
             # Save KPI data
-            kpi_df = pd.DataFrame(kpi_data)
-            output_path = 'data/processed/kpi_metrics_latest.csv'
-            kpi_df.to_csv(output_path, index=False)
+            output_path = 'data/processed/kpi_metrics_latest.parquet'
+            kpi_df.to_parquet(output_path, engine='pyarrow', compression='zstd', index=False)
+            self._kpi_df = kpi_df
             
-            logging.info(f"KPI metrics calculated successfully: {len(kpi_data)} campaigns")
+            logging.info(f"KPI metrics calculated successfully: {len(kpi_df)} campaigns")
             self.refresh_status['kpi_calculation'] = {
                 'status': 'success',
                 'timestamp': datetime.now().isoformat(),
-                'campaigns_processed': len(kpi_data)
+                'campaigns_processed': len(kpi_df)
             }
             
             return True
@@ -276,56 +464,48 @@ class MarketingDataRefresh:
         try:
             logging.info("Generating performance alerts...")
             
-            # Load KPI data
-            kpi_data = pd.read_csv('data/processed/kpi_metrics_latest.csv')
+            # Use KPI data in memory, or the last saved KPI metrics
+            kpi_data = self._kpi_df
+            if kpi_data is None:
+                kpi_data = pd.read_parquet('data/processed/kpi_metrics_latest.parquet')
             
-            alerts = []
+            alert_columns = ['type', 'campaign_id', 'campaign_name', 'channel', 'issue']
+            action_columns = ['recommended_action', 'priority']
             
             # Check for campaigns with negative ROI
-            negative_roi = kpi_data[kpi_data['roi_percentage'] < 0]
-            for _, campaign in negative_roi.iterrows():
-                alerts.append({
-                    'type': 'Critical',
-                    'campaign_id': campaign['campaign_id'],
-                    'campaign_name': campaign['campaign_name'],
-                    'channel': campaign['channel'],
-                    'issue': 'Negative ROI',
-                    'current_roi': f"{campaign['roi_percentage']:.2f}%",
-                    'recommended_action': 'Pause campaign and review targeting',
-                    'priority': 'High'
-                })
+            negative_roi = kpi_data[kpi_data['roi_percentage'] < 0].assign(
+                type='Critical',
+                issue='Negative ROI',
+                current_roi=lambda d: d['roi_percentage'].map('{:.2f}%'.format),
+                recommended_action='Pause campaign and review targeting',
+                priority='High'
+            )[alert_columns + ['current_roi'] + action_columns]
             
             # Check for campaigns with high cost per lead
-            high_cpl = kpi_data[kpi_data['cost_per_lead'] > 100]
-            for _, campaign in high_cpl.iterrows():
-                alerts.append({
-                    'type': 'Warning',
-                    'campaign_id': campaign['campaign_id'],
-                    'campaign_name': campaign['campaign_name'],
-                    'channel': campaign['channel'],
-                    'issue': 'High Cost Per Lead',
-                    'current_cpl': f"${campaign['cost_per_lead']:.2f}",
-                    'recommended_action': 'Optimize targeting or reduce bid',
-                    'priority': 'Medium'
-                })
+            high_cpl = kpi_data[kpi_data['cost_per_lead'] > 100].assign(
+                type='Warning',
+                issue='High Cost Per Lead',
+                current_cpl=lambda d: d['cost_per_lead'].map('${:.2f}'.format),
+                recommended_action='Optimize targeting or reduce bid',
+                priority='Medium'
+            )[alert_columns + ['current_cpl'] + action_columns]
             
             # Check for campaigns with low conversion rates
-            low_conversion = kpi_data[kpi_data['conversion_rate'] < 5]
-            for _, campaign in low_conversion.iterrows():
-                alerts.append({
-                    'type': 'Warning',
-                    'campaign_id': campaign['campaign_id'],
-                    'campaign_name': campaign['campaign_name'],
-                    'channel': campaign['channel'],
-                    'issue': 'Low Conversion Rate',
-                    'current_conversion': f"{campaign['conversion_rate']:.2f}%",
-                    'recommended_action': 'Review landing page and offer',
-                    'priority': 'Medium'
-                })
+            low_conversion = kpi_data[kpi_data['conversion_rate'] < 5].assign(
+                type='Warning',
+                issue='Low Conversion Rate',
+                current_conversion=lambda d: d['conversion_rate'].map('{:.2f}%'.format),
+                recommended_action='Review landing page and offer',
+                priority='Medium'
+            )[alert_columns + ['current_conversion'] + action_columns]
+            
+            # Only categories with alerts contribute columns, as with the old list of dicts
+            alert_frames = [frame for frame in (negative_roi, high_cpl, low_conversion) if not frame.empty]
+            alerts_df = pd.concat(alert_frames, ignore_index=True) if alert_frames else pd.DataFrame()
+            alerts = alerts_df.to_dict('records')
             
             # Save alerts
             if alerts:
-                alerts_df = pd.DataFrame(alerts)
                 output_path = 'data/processed/performance_alerts.csv'
                 alerts_df.to_csv(output_path, index=False)
                 
@@ -362,43 +542,7 @@ class MarketingDataRefresh:
             # Create email content
             subject = f"Marketing Campaign Alerts - {datetime.now().strftime('%Y-%m-%d %H:%M')}"
             
-            html_content = f"""
-            <html>
-                <body>
-                    <h2>Marketing Campaign Performance Alerts</h2>
-                    <p>Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
-                    <p>Total Alerts: {len(alerts)}</p>
-                    
-                    <table border="1" style="border-collapse: collapse;">
-                        <tr style="background-color: #f2f2f2;">
-                            <th>Priority</th>
-                            <th>Campaign</th>
-                            <th>Channel</th>
-                            <th>Issue</th>
-                            <th>Action Required</th>
-                        </tr>
-            """
-            
-            for alert in alerts:
-                priority_color = "#ff4444" if alert['priority'] == 'High' else "#ffaa00"
-                html_content += f"""
-                        <tr>
-                            <td style="background-color: {priority_color}; color: white; font-weight: bold;">{alert['priority']}</td>
-                            <td>{alert['campaign_name']}</td>
-                            <td>{alert['channel']}</td>
-                            <td>{alert['issue']}</td>
-                            <td>{alert['recommended_action']}</td>
-                        </tr>
-                """
-            
-            html_content += """
-                    </table>
-                    <br>
-                    <p>Please review and take appropriate actions for the flagged campaigns.</p>
-                    <p>Best regards,<br>Marketing Analytics Team</p>
-                </body>
-            </html>
-            """
+            html_content = self.alert_template.render(alerts=alerts, now=datetime.now())
             
             # Send email
             msg = MIMEMultipart('alternative')
@@ -431,13 +575,17 @@ class MarketingDataRefresh:
         
         success_count = 0
         
-        # Step 1: Refresh campaign data
-        if self.refresh_campaign_data():
-            success_count += 1
-        
-        # Step 2: Refresh budget data  
-        if self.refresh_budget_data():
-            success_count += 1
+        # Step 1 & 2: Refresh campaign and budget data in one transaction,
+        # so both extracts come from the same database snapshot
+        conn = self.open_snapshot_connection()
+        try:
+            if self.refresh_campaign_data(conn):
+                success_count += 1
+            if self.refresh_budget_data(conn):
+                success_count += 1
+        finally:
+            if conn is not None:
+                conn.close()
         
         # Step 3: Calculate KPIs
         if self.calculate_kpis():
@@ -460,8 +608,9 @@ class MarketingDataRefresh:
             os.makedirs('logs', exist_ok=True)
             status_file = f"logs/refresh_status_{datetime.now().strftime('%Y%m%d')}.json"
             
-            with open(status_file, 'w') as f:
-                json.dump(self.refresh_status, f, indent=2)
+            Path(status_file).write_bytes(
+                orjson.dumps(self.refresh_status, option=orjson.OPT_INDENT_2)
+            )
                 
             logging.info(f"Refresh status saved to {status_file}")
             
@@ -471,27 +620,35 @@ class MarketingDataRefresh:
     def schedule_refresh_jobs(self):
         """Set up automated refresh schedule"""
         logging.info("Setting up automated refresh schedule...")
-        
+        asyncio.run(self.run_scheduler())
+    
+    async def run_scheduler(self):
+        """Register refresh jobs and sleep until each one is due"""
         config = self.config['refresh_schedule']
         
+        # One worker so jobs due at the same time run one after another; no
+        # misfire grace limit, so a job queued behind a running refresh still runs
+        scheduler = AsyncIOScheduler(
+            executors={'default': SchedulerThreadPool(max_workers=1)},
+            job_defaults={'misfire_grace_time': None}
+        )
+        
         # Hourly refresh during active campaigns (business hours)
         if config.get('hourly_during_campaigns', False):
-            for hour in range(9, 18):  # 9 AM to 5 PM
-                schedule.every().day.at(f"{hour:02d}:00").do(self.full_refresh)
+            scheduler.add_job(self.full_refresh, 'cron', hour='9-17', minute=0)  # 9 AM to 5 PM
         
         # Daily summary refresh
-        daily_time = config.get('daily_summary', '08:00')
-        schedule.every().day.at(daily_time).do(self.full_refresh)
+        daily_hour, daily_minute = config.get('daily_summary', '08:00').split(':')
+        scheduler.add_job(self.full_refresh, 'cron', hour=int(daily_hour), minute=int(daily_minute))
         
         # Weekly comprehensive refresh
-        schedule.every().monday.at("09:00").do(self.full_refresh)
+        scheduler.add_job(self.full_refresh, 'cron', day_of_week='mon', hour=9, minute=0)
         
         logging.info("Refresh schedule configured successfully")
         
-        # Run scheduler
-        while True:
-            schedule.run_pending()
-            time.sleep(60)  # Check every minute
+        # Run scheduler; the event loop sleeps until the next fire time
+        scheduler.start()
+        await asyncio.Event().wait()
 
 def main():
     """
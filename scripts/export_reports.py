@@ -8,6 +8,7 @@ Location: Jammu, J&K, India
 
 import pandas as pd
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 class ReportExporter:
@@ -17,12 +18,13 @@ class ReportExporter:
     def __init__(self, data_folder='data/processed/', output_folder='reports/'):
         self.data_folder = data_folder
         self.output_folder = output_folder
+        self.excel_executor = ThreadPoolExecutor(max_workers=1)
         os.makedirs(output_folder, exist_ok=True)
 
     def load_data(self, filename):
         try:
             path = f"{self.data_folder}{filename}"
-            data = pd.read_csv(path)
+            data = pd.read_parquet(path)
             print(f"Loaded {len(data)} records from {filename}")
             return data
         except Exception as e:
@@ -30,16 +32,23 @@ class ReportExporter:
             return None
 
     def export_summary(self):
-        campaign_data = self.load_data('campaign_data_latest.csv')
-        kpi_data = self.load_data('kpi_metrics_latest.csv')
+        campaign_data = self.load_data('campaign_data_latest.parquet')
+        kpi_data = self.load_data('kpi_metrics_latest.parquet')
 
         if campaign_data is None or kpi_data is None:
             print("Required data not found for report export.")
             return False
 
-        # Generate summary report combining campaign and KPI data
-        summary = pd.merge(campaign_data, kpi_data,
-                           on='campaign_id', how='inner')
+        # Generate summary report combining campaign and KPI data;
+        # campaign_id is unique on both sides, so join on the index
+        kpi_columns = [
+            'roi_percentage', 'cost_per_lead', 'cost_per_acquisition',
+            'conversion_rate', 'click_through_rate'
+        ]
+        campaign_data = campaign_data.drop(columns=kpi_columns, errors='ignore')
+        campaign_data = campaign_data.set_index('campaign_id', verify_integrity=True)
+        kpi_data = kpi_data.set_index('campaign_id', verify_integrity=True)[kpi_columns]
+        summary = campaign_data.join(kpi_data, how='inner').reset_index()
 
         # Select key columns for report
         report_columns = [
@@ -55,15 +64,29 @@ class ReportExporter:
         excel_path = os.path.join(self.output_folder, f'report_{timestamp}.xlsx')
 
         report.to_csv(csv_path, index=False)
-        report.to_excel(excel_path, index=False)
+        print(f"Report exported to:\n - {csv_path}")
 
-        print(f"Report exported to:\n - {csv_path}\n - {excel_path}")
+        # CSV is the primary format; the Excel copy is written in the background
+        self.excel_executor.submit(self.export_excel, report, excel_path)
         return True
 
+    def export_excel(self, report, excel_path):
+        try:
+            with pd.ExcelWriter(excel_path, engine='xlsxwriter') as writer:
+                report.to_excel(writer, index=False, sheet_name='report')
+            print(f"Excel report exported to:\n - {excel_path}")
+        except Exception as e:
+            print(f"Failed to export {excel_path}: {str(e)}")
+
+    def close(self):
+        # Wait for pending Excel exports to finish
+        self.excel_executor.shutdown(wait=True)
+
 def main():
     print("=== Marketing Campaign Report Exporter ===")
     exporter = ReportExporter()
     exporter.export_summary()
+    exporter.close()
     print("=== Export Complete ===")
 
 if __name__ == "__main__":